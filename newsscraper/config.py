@@ -3,8 +3,10 @@
 # --- Core Libraries ---
 import random
 from datetime import datetime, timedelta
+import hashlib
 import os
-import json
+import diskcache
+import orjson
 from google import genai
 from pydantic import BaseModel
 
@@ -74,6 +76,7 @@ STORY_SIMILARITY_THRESHOLD = 0.6
 SELECTED_ENGINE = 'gemini'
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 LLM_MAX_TOKENS_PER_CALL = 50000
+LLM_MAX_TOKENS_PER_STORY = 2000
 LLM_TPM_LIMIT = 250000
 
 # ==============================================================================
@@ -89,6 +92,19 @@ class StoryAnalysis(BaseModel):
     locations: list[str]
     suggested_category: str
 
+# Persistent cache of Gemini results, keyed by the SHA-256 of each story's text.
+# Stories already analyzed in a previous run are served from disk instead of
+# being re-sent to the paid endpoint.
+_cache = diskcache.Cache(".gemini_cache")
+
+def _story_hash(text: str) -> str:
+    """Content-addressable key for a story's combined text."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def analysis_cache_has(text: str) -> bool:
+    """Returns True if a story with this exact text was already analyzed."""
+    return _story_hash(text) in _cache
+
 def mock_analysis_engine(article_text: str) -> dict:
     """A fake analysis engine for fast, free, and predictable testing."""
     return {
@@ -99,18 +115,43 @@ def mock_analysis_engine(article_text: str) -> dict:
         "llm_suggested_category": random.choice(list(CATEGORICAL_QUERIES.keys()))
     }
     
-def gemini_analysis_engine(batch_input_json: str) -> dict | list:
-    """
-    Analyzes a batch of stories using Gemini's native JSON mode for reliable structured output.
-    """
-    if not GEMINI_API_KEY:
-        return {"error": "GEMINI_API_KEY environment variable not set."}
+_GEMINI_MODEL = "gemini-2.5-flash"
+_GEMINI_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": list[StoryAnalysis],
+}
 
-    try:
-        client = genai.Client()
-        model_name = "gemini-2.5-flash" 
-    
-        prompt = f"""
+# Lazy client singleton: building genai.Client() re-reads env vars and sets up
+# the underlying transport, so do it once and share the connection pool across
+# every (possibly concurrent) batch call.
+_CLIENT: genai.Client | None = None
+
+def _get_client() -> genai.Client:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = genai.Client()
+    return _CLIENT
+
+def _split_cached_stories(batch_input_json: str) -> tuple[list[dict], list[dict]]:
+    """Splits a batch into cached results and the misses that still need the API."""
+    stories = orjson.loads(batch_input_json)
+    cached_results = []
+    misses = []
+    for story in stories:
+        cached = _cache.get(_story_hash(story["text"]))
+        if cached is not None:
+            # The cached analysis may carry a story_index from a previous
+            # run; rebind it to this run's index.
+            cached = {**cached, "story_index": story["story_index"]}
+            cached_results.append(cached)
+        else:
+            misses.append(story)
+    if cached_results:
+        print(f"    -> Cache: {len(cached_results)} of {len(stories)} stories served from .gemini_cache.")
+    return cached_results, misses
+
+def _build_gemini_prompt(batch_input_json: str) -> str:
+    return f"""
             You are an expert news analysis engine. Your task is to process a batch of news stories.
             For each story provided, you must perform the following analysis independently. Do not let information from one story influence another. Provide
             a one sentence summary for each story.
@@ -123,31 +164,83 @@ def gemini_analysis_engine(batch_input_json: str) -> dict | list:
             Here is the batch of stories to analyze:
             {batch_input_json}
             """
-            
-        print(f"    -> Sending request to Gemini API model: '{model_name}'...")
+
+def _merge_gemini_response(response, cached_results: list[dict], misses: list[dict]) -> list[dict]:
+    """Caches freshly analyzed stories and merges them with the cache hits."""
+    # CORRECTED: The .parsed attribute already returns a list of dictionaries.
+    # No need to call .model_dump().
+    if isinstance(response.parsed, list):
+        text_by_index = {story["story_index"]: story["text"] for story in misses}
+        fresh_results = []
+        for item in response.parsed:
+            result = item.model_dump()
+            miss_text = text_by_index.get(result["story_index"])
+            if miss_text is not None:
+                _cache.set(_story_hash(miss_text), result)
+            fresh_results.append(result)
+        return cached_results + fresh_results
+    else:
+        # Handle cases where the model might return an empty or non-list response (e.g., safety block)
+        print(f"  [WARNING] Gemini API did not return a list of results. Response was: {response.text}")
+        return cached_results
+
+def gemini_analysis_engine(batch_input_json: str) -> dict | list:
+    """
+    Analyzes a batch of stories using Gemini's native JSON mode for reliable structured output.
+    """
+    if not GEMINI_API_KEY:
+        return {"error": "GEMINI_API_KEY environment variable not set."}
+
+    try:
+        cached_results, misses = _split_cached_stories(batch_input_json)
+        if not misses:
+            return cached_results
+
+        client = _get_client()
+        prompt = _build_gemini_prompt(orjson.dumps(misses).decode())
+
+        print(f"    -> Sending request to Gemini API model: '{_GEMINI_MODEL}'...")
         response = client.models.generate_content(
-            model=model_name,
+            model=_GEMINI_MODEL,
             contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": list[StoryAnalysis],
-            }
+            config=_GEMINI_CONFIG,
         )
-        
-        # CORRECTED: The .parsed attribute already returns a list of dictionaries.
-        # No need to call .model_dump().
-        if isinstance(response.parsed, list):
-            return [item.model_dump() for item in response.parsed]
-        else:
-            # Handle cases where the model might return an empty or non-list response (e.g., safety block)
-            print(f"  [WARNING] Gemini API did not return a list of results. Response was: {response.text}")
-            return []
-        
+        return _merge_gemini_response(response, cached_results, misses)
+
     except Exception as e:
         error_msg = f"An unexpected error occurred with the Gemini API call: {e}"
         print(f"  [FATAL ERROR] {error_msg}")
         return {"error": str(e)}
-    
+
+async def gemini_analysis_engine_async(batch_input_json: str) -> dict | list:
+    """
+    Async variant of gemini_analysis_engine, so the orchestrator can keep
+    several batches in flight and hide the per-request network round-trip.
+    """
+    if not GEMINI_API_KEY:
+        return {"error": "GEMINI_API_KEY environment variable not set."}
+
+    try:
+        cached_results, misses = _split_cached_stories(batch_input_json)
+        if not misses:
+            return cached_results
+
+        client = _get_client()
+        prompt = _build_gemini_prompt(orjson.dumps(misses).decode())
+
+        print(f"    -> Sending request to Gemini API model: '{_GEMINI_MODEL}'...")
+        response = await client.aio.models.generate_content(
+            model=_GEMINI_MODEL,
+            contents=prompt,
+            config=_GEMINI_CONFIG,
+        )
+        return _merge_gemini_response(response, cached_results, misses)
+
+    except Exception as e:
+        error_msg = f"An unexpected error occurred with the Gemini API call: {e}"
+        print(f"  [FATAL ERROR] {error_msg}")
+        return {"error": str(e)}
+
 ANALYSIS_ENGINES = {
     'mock': mock_analysis_engine,
     'gemini':  gemini_analysis_engine,
@@ -158,6 +251,16 @@ def analyze_article(engine_name: str, **kwargs) -> dict:
     try:
         engine_function = ANALYSIS_ENGINES[engine_name]
         return engine_function(**kwargs)
+    except Exception as e:
+        print(f"ERROR: Analysis engine '{engine_name}' failed: {e}")
+        return {"error": str(e)}
+
+async def analyze_article_async(engine_name: str, **kwargs) -> dict | list:
+    """Async analysis orchestrator; engines without an async variant run inline."""
+    try:
+        if engine_name == 'gemini':
+            return await gemini_analysis_engine_async(**kwargs)
+        return ANALYSIS_ENGINES[engine_name](**kwargs)
     except Exception as e:
         print(f"ERROR: Analysis engine '{engine_name}' failed: {e}")
         return {"error": str(e)}
\ No newline at end of file
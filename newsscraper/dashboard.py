@@ -1,10 +1,10 @@
 # dashboard.py
 
 import streamlit as st
+import orjson
 import pandas as pd
-import json
 from pathlib import Path
-from datetime import datetime, timezone
+from collections import defaultdict
 from st_keyup import st_keyup
 
 # --- Page Configuration ---
@@ -16,60 +16,61 @@ st.set_page_config(
 
 # --- Data Loading Function (FINAL) ---
 @st.cache_data
-def load_data() -> tuple[list[dict], dict[str, dict], str | None]:
+def load_data() -> tuple[list[dict], dict[str, dict], dict[str, list[int]], str | None]:
     """
     Loads the latest stories and articles, safely handling missing dates.
     Returns:
-        - A list of story dictionaries.
+        - A list of story dictionaries, sorted newest-first.
         - A dictionary mapping article_id to article data.
+        - A dictionary mapping category to story indices in the sorted list.
         - The name of the stories file loaded.
     """
     #UNCOMMENT TO RUN LOCALLY
-    #stories_file = Path("output_stories.json")
-    #articles_file = Path("output_articles.jsonl")
-    
+    #stories_file = Path("output_stories.parquet")
+    #articles_file = Path("output_articles.json")
+
     #TO RUN IN STREAMLIT COMMUNITY CLOUD
-    script_dir = Path(__file__).parent 
-    
+    script_dir = Path(__file__).parent
+
     # Build paths relative to the script's directory
-    stories_file = script_dir / "output_stories.json"
-    articles_file = script_dir / "output_articles.jsonl"
+    stories_file = script_dir / "output_stories.parquet"
+    articles_file = script_dir / "output_articles.json"
 
     if not stories_file.exists() or not articles_file.exists():
-        return [], {}, None
-
-    # Load the stories
-    with open(stories_file, 'r', encoding='utf-8') as f:
-        stories_data = json.load(f)
-    
-    # Load the articles and create a lookup map
-    articles_map = {}
-    with open(articles_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            article = json.loads(line)
-            articles_map[article['article_id']] = article
-
-    # This is our universal, timezone-aware default for any story with a missing/bad date.
-    AWARE_MIN_DATE = datetime.min.replace(tzinfo=timezone.utc)
-
+        return [], {}, {}, None
+
+    # Parquet decode is columnar and C-backed -- much faster than parsing
+    # JSONL line-by-line in Python.
+    stories_df = pd.read_parquet(stories_file)
+    # The orchestrator already writes the articles as a dict keyed by
+    # article_id, so one orjson.loads yields the lookup map directly.
+    with open(articles_file, 'rb') as f:
+        articles_map = orjson.loads(f.read())
+
+    # One vectorized cast replaces the old per-story try/except parse loop;
+    # missing or malformed dates coerce to NaT (datetime.min would be below
+    # pandas' nanosecond Timestamp bounds and break the datetime64 column).
+    stories_df['first_seen_at_dt'] = pd.to_datetime(stories_df['first_seen_at'], utc=True, errors='coerce')
+    # Sort newest-first once here; every feed renders in this order, so the
+    # per-rerun sort is gone. Undated stories (NaT) go last.
+    stories_df = stories_df.sort_values('first_seen_at_dt', ascending=False, na_position='last')
+    stories_data = stories_df.to_dict(orient='records')
+
+    # Category -> indices into the sorted story list, so per-category feeds
+    # are a lookup instead of a full scan on every interaction.
+    category_index = defaultdict(list)
+    for i, story in enumerate(stories_data):
+        if story.get('suggested_category'):
+            category_index[story['suggested_category']].append(i)
+
+    # Lowercase the searchable fields once here, so the live-search filter is
+    # a plain substring check instead of two .lower() calls per story per
+    # keystroke.
     for story in stories_data:
-        pub_date_str = story.get('first_seen_at')
-        
-        # This logic robustly handles all date cases.
-        if pub_date_str:
-            try:
-                # If the date string exists, try to parse it.
-                dt = pd.to_datetime(pub_date_str)
-                # Now that we know dt is a real datetime, we can safely check tzinfo.
-                story['first_seen_at_dt'] = dt.tz_convert('UTC') if dt.tzinfo else dt.tz_localize('UTC')
-            except (ValueError, TypeError):
-                # If parsing fails on a non-empty string, use the default.
-                story['first_seen_at_dt'] = AWARE_MIN_DATE
-        else:
-            # If the date string was None or empty from the start, use the default.
-            story['first_seen_at_dt'] = AWARE_MIN_DATE
-    
-    return stories_data, articles_map, stories_file.name
+        story['_title_lower'] = (story.get('canonical_title') or '').lower()
+        story['_summary_lower'] = (story.get('summary') or '').lower()
+
+    return stories_data, articles_map, dict(category_index), stories_file.name
 
 # --- Reusable UI Function for Story Display ---
 def display_story_expander(story_dict, articles_map):
@@ -107,16 +108,17 @@ def display_story_expander(story_dict, articles_map):
 
 
 # --- Main Application ---
-stories_data, articles_map, filename = load_data()
+stories_data, articles_map, category_index, filename = load_data()
 
 if not stories_data:
     st.title("Intelligence Briefing")
-    st.warning("No data files found (`output_stories.json`, `output_articles.jsonl`). Please run the main scraper first.")
+    st.warning("No data files found (`output_stories.parquet`, `output_articles.json`). Please run the main scraper first.")
     st.stop()
 
 # --- Sidebar Navigation ---
-# This is now dynamically generated from the stories data.
-all_categories = sorted(list(set(story.get('suggested_category') for story in stories_data if story.get('suggested_category'))))
+# Dynamically generated from the category index built in load_data -- no need
+# to sweep every story again on each rerun.
+all_categories = sorted(category_index)
 page_options = ["Dashboard Overview", "All Stories"] + all_categories
 
 st.sidebar.title("Navigation")
@@ -131,24 +133,22 @@ if selected_page == "Dashboard Overview":
     
     selected_overview_categories = st.multiselect("Filter by Category", all_categories, key="overview_cat_filter")
 
-    # Filtering logic for stories
-    overview_data = stories_data
-    if selected_overview_categories:
-        overview_data = [
-            story for story in overview_data 
-            if story.get('suggested_category') in selected_overview_categories
-        ]
-    
+    # Per-category counts come straight from the prebuilt index sizes -- one
+    # dict lookup per category instead of a value_counts pass over the stories.
+    visible_categories = selected_overview_categories or all_categories
+    category_counts = {category: len(category_index[category]) for category in visible_categories}
+
     st.markdown("---")
     m_col1, m_col2 = st.columns(2)
-    m_col1.metric("Stories in View", len(overview_data))
+    if selected_overview_categories:
+        m_col1.metric("Stories in View", sum(category_counts.values()))
+    else:
+        m_col1.metric("Stories in View", len(stories_data))
     m_col2.metric("Total Unique Categories", len(all_categories))
-    
+
     st.subheader("Story Count by Category")
-    if overview_data:
-        # Create a pandas Series directly for efficient counting
-        category_counts = pd.Series([story['suggested_category'] for story in overview_data]).value_counts()
-        st.bar_chart(category_counts)
+    if category_counts:
+        st.bar_chart(pd.Series(category_counts).sort_values(ascending=False))
     else:
         st.write("No stories to display based on filters.")
 
@@ -167,26 +167,24 @@ else:
     search_query = st_keyup("Search titles & summaries (live)", debounce=300, key=search_key)
     st.markdown("---")
 
-    # High-performance filtering for the feed
-    feed_data = stories_data
-    
+    # High-performance filtering for the feed: category pages are an index
+    # lookup into the pre-sorted story list.
     if page_category_filter:
-        feed_data = [story for story in feed_data if story.get('suggested_category') == page_category_filter]
+        feed_data = [stories_data[i] for i in category_index.get(page_category_filter, [])]
+    else:
+        feed_data = stories_data
 
     if search_query:
         query = search_query.lower()
         feed_data = [
-            story for story in feed_data 
-            if query in story.get('canonical_title', '').lower() or query in story.get('summary', '').lower()
+            story for story in feed_data
+            if query in story['_title_lower'] or query in story['_summary_lower']
         ]
         
     st.write(f"Displaying **{len(feed_data)}** stories.")
     if not feed_data:
         st.info("No stories match the current filters.")
     else:
-        # The sort key is now completely safe because we guarantee `first_seen_at_dt`
-        # is always a valid, timezone-aware datetime object.
-        feed_data.sort(key=lambda x: x['first_seen_at_dt'], reverse=True)
-        
+        # Stories are already sorted newest-first by load_data.
         for story_dict in feed_data:
             display_story_expander(story_dict, articles_map)
\ No newline at end of file
@@ -0,0 +1,27 @@
+# embedder.py
+
+# Cached singleton loaders for the heavyweight encoders used by the pipeline.
+# functools.lru_cache makes every call after the first free within a process;
+# Streamlit callers can additionally wrap these in @st.cache_resource so the
+# objects survive across script reruns.
+
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedder():
+    """Loads the sentence-transformer model once per process (GPU/MPS if available)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    device = 'cuda' if torch.cuda.is_available() else ('mps' if torch.backends.mps.is_available() else 'cpu')
+    model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+    if device == 'cuda':
+        model.half()
+    return model
+
+
+@functools.lru_cache(maxsize=1)
+def get_token_encoder():
+    """Loads the tiktoken encoder once per process (rebuilding its trie is not free)."""
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
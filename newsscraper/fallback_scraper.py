@@ -1,6 +1,7 @@
 # fallback_scraper.py
 
 import asyncio
+from collections import defaultdict
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from urllib.parse import urlparse
 import config
@@ -11,17 +12,17 @@ async def scrape_single_page(page, url: str) -> dict | None:
     likely requires JavaScript rendering.
     """
     try:
-        # Go to the URL, wait for the page to be mostly loaded.
-        await page.goto(url, wait_until='domcontentloaded', timeout=20000)
-        
+        # 'commit' returns as soon as navigation starts; we then wait only for
+        # the one element we actually need, which on most news sites appears
+        # well before DOMContentLoaded fires.
+        await page.goto(url, wait_until='commit', timeout=15000)
+
         # A simple but effective heuristic: look for the <main> element
         # which semantically should contain the primary content.
         # This can be made more robust with more selectors.
+        await page.wait_for_selector('main, article, [role=main]', timeout=8000)
         main_content = page.locator('main, article, [role=main]')
         
-        # Wait for the element to be visible
-        await main_content.first.wait_for(timeout=10000)
-        
         # Extract the text and title
         full_text = await main_content.first.inner_text()
         title = await page.title()
@@ -54,14 +55,26 @@ async def run_fallback_scraper(fallback_urls: list[str]) -> list[dict]:
     """
     scraped_data = []
     semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_BROWSERS) # Reuse config
+    # Spread the global budget across domains: more than a few concurrent
+    # pages against one site just earns 429s while other domains sit idle.
+    domain_semaphores = defaultdict(lambda: asyncio.Semaphore(3))
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        
+
+        # One shared context for every page: cookies and the HTTP cache are
+        # reused across URLs instead of rebuilt per new_page call.
+        context = await browser.new_context(user_agent=config.USER_AGENT)
+
+        # Block the heavy resource types. JS still runs (we need it to render
+        # the article), but images/fonts/media/stylesheets are ~70% of the
+        # subrequests and contribute nothing to the text we extract.
+        blocked_types = {"image", "font", "media", "stylesheet"}
+        await context.route("**/*", lambda route: route.abort() if route.request.resource_type in blocked_types else route.continue_())
+
         async def scrape_with_semaphore(url):
-            async with semaphore:
-                page = await browser.new_page(user_agent=config.USER_AGENT)
-                # We DON'T block resources here because we need CSS/JS to render the page
+            async with semaphore, domain_semaphores[urlparse(url).netloc]:
+                page = await context.new_page()
                 data = await scrape_single_page(page, url)
                 if data:
                     scraped_data.append(data)
@@ -71,6 +84,7 @@ async def run_fallback_scraper(fallback_urls: list[str]) -> list[dict]:
         print(f"Attempting to scrape {len(fallback_urls)} URLs with Playwright...")
         tasks = [scrape_with_semaphore(url) for url in fallback_urls]
         await asyncio.gather(*tasks)
+        await context.close()
         await browser.close()
     
     print(f"-> Successfully scraped {len(scraped_data)} articles via fallback.")
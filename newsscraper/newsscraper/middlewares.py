@@ -3,12 +3,44 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+from urllib.parse import urlsplit
+
 from scrapy import signals
+from scrapy.http import TextResponse
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
 
+class Skip403DomainsMiddleware:
+    """Short-circuits requests to hosts that have already answered 403.
+
+    Without this, every URL on a blocking host still downloads a full error
+    body before the spider notices the status. Once a host 403s, further
+    requests to it get a synthetic bodyless 403 response instead of hitting
+    the network, so the spider's existing 403 handling still routes them to
+    the fallback file.
+    """
+
+    def __init__(self):
+        self.blocked_hosts = set()
+
+    def process_request(self, request, spider):
+        host = urlsplit(request.url).netloc
+        if host in self.blocked_hosts:
+            spider.logger.debug("Skipping download for known-403 host %s", host)
+            return TextResponse(url=request.url, status=403, request=request)
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 403:
+            host = urlsplit(request.url).netloc
+            if host not in self.blocked_hosts:
+                self.blocked_hosts.add(host)
+                spider.logger.info("Host %s returned 403; skipping further downloads from it.", host)
+        return response
+
+
 class NewsscraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
@@ -21,20 +21,25 @@ class FallbackUrlPipeline:
         It finds the fallback filename from the spider's attributes.
         It clears the old fallback file, which your orchestrator was doing before.
         """
-        self.fallback_filepath = os.path.join(
-            os.path.dirname(__file__), '..', # This ensures the file is in the project root (newsscraper/)
+        # Resolved to an absolute path under the scrapy.cfg project root (the
+        # directory above this package), so the orchestrator can read the
+        # same file back regardless of either process's cwd.
+        self.fallback_filepath = os.path.abspath(os.path.join(
+            os.path.dirname(__file__), '..',
             getattr(spider, 'FALLBACK_FILENAME', 'fallback_urls.txt')
-        )
+        ))
         
-        # This pipeline now handles cleaning up the old file.
-        if os.path.exists(self.fallback_filepath):
-            os.remove(self.fallback_filepath)
-        
-        self.file = open(self.fallback_filepath, 'a')
+        # This pipeline now handles cleaning up the old file: a truncating
+        # binary open replaces the old stat + unlink + open triple with a
+        # single syscall. The 128 KiB buffer batches failures into a handful
+        # of large write() calls instead of one per URL.
+        self.file = open(self.fallback_filepath, 'wb', buffering=1 << 17)
+        self.items_since_flush = 0
         spider.logger.info(f"Opened fallback file for writing: {self.fallback_filepath}")
 
     def close_spider(self, spider):
         """Called when the spider is closed."""
+        self.file.flush()
         self.file.close()
 
     def process_item(self, item, spider):
@@ -43,7 +48,13 @@ class FallbackUrlPipeline:
         """
         # We check if the item is a "failure" item by looking for the 'failed_url' key.
         if 'failed_url' in item:
-            self.file.write(item['failed_url'] + '\n')
+            self.file.write((item['failed_url'] + '\n').encode())
+            # Flush periodically so a crashed spider still leaves a
+            # mostly-complete fallback file behind.
+            self.items_since_flush += 1
+            if self.items_since_flush >= 500:
+                self.file.flush()
+                self.items_since_flush = 0
             # We "drop" the item so it doesn't get written to scraped_data.jsonl
             raise DropItem(f"URL failed and was written to fallback file: {item['failed_url']}")
         else:
@@ -1,8 +1,117 @@
 # newsscraper/newsscraper/spiders/content_spider.py
 
+import asyncio
+import io
+import mmap
+import multiprocessing
+import os
+import re
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.html
+import orjson
 import scrapy
+import trafilatura
 from newspaper import Article, ArticleException
-import os
+from parsel.csstranslator import HTMLTranslator
+
+# Pulls the hostname out of an absolute URL without allocating the full
+# substring list that url.split('/')[2] builds per response.
+_HOST_RE = re.compile(r'^[^/]+//([^/]+)')
+
+# The extraction helpers live at module level so they are picklable and can
+# run in ProcessPoolExecutor workers, off the reactor thread. They return a
+# result dict or None; logging stays in the spider, which knows the context.
+
+def _decode_html(html, encoding):
+    """Decodes raw body bytes exactly once, inside the worker process.
+
+    Passing bytes to the pool means the reactor never materializes
+    response.text (a full decoded copy) just to ship it to a worker.
+    Already-decoded strings (the precision container) pass through.
+    """
+    if isinstance(html, bytes):
+        return html.decode(encoding or 'utf-8', 'replace')
+    return html
+
+def _extract_with_newspaper(html, url, min_text_length, encoding=None):
+    """Newspaper3k extraction, used for the precision container path."""
+    try:
+        article = Article(url=url)
+        # set_html skips download()'s input handling; the HTML is decoded
+        # exactly once, here in the worker.
+        article.set_html(_decode_html(html, encoding))
+        article.parse()
+        if not article.text or len(article.text) < min_text_length:
+            raise ArticleException(f"Extracted text is too short ({len(article.text)} chars).")
+        pub_date = article.publish_date
+        return {
+            'title': article.title,
+            'published_at': pub_date.isoformat() if pub_date else None,
+            'full_text': article.text,
+        }
+    except Exception:
+        return None
+
+def _extract_with_trafilatura(html, url, min_text_length, encoding=None):
+    """Whole-page extraction via trafilatura's C-backed lxml pipeline.
+
+    Much cheaper than newspaper3k's full Article pipeline (language config,
+    author/image heuristics) for the general path, where we only need title,
+    text and date.
+    """
+    try:
+        extracted = trafilatura.extract(
+            _decode_html(html, encoding),
+            url=url,
+            output_format='json',
+            include_comments=False,
+            favor_precision=True,
+            with_metadata=True,
+        )
+        if not extracted:
+            return None
+        data = orjson.loads(extracted)
+        text = data.get('text') or ''
+        if len(text) < min_text_length:
+            return None
+        return {
+            'title': data.get('title'),
+            'published_at': data.get('date'),
+            'full_text': text,
+        }
+    except Exception:
+        return None
+
+# One recovering parser per worker process, shared across parses: lxml
+# otherwise allocates a fresh HTMLParser for every fromstring() call, which
+# shows up as allocator pressure at thousands of URLs per minute.
+_LXML_PARSER = lxml.html.HTMLParser(recover=True, remove_comments=True, remove_pis=True)
+
+def _extract_with_lxml(html, url, min_text_length, encoding=None):
+    """Bare-bones last-resort extraction straight off the lxml tree.
+
+    No boilerplate detection: title from <title>, text from every <p>,
+    date from the article:published_time meta tag. Runs only when both
+    the precision and general strategies came up empty, salvaging pages
+    those heuristics reject outright.
+    """
+    try:
+        tree = lxml.html.fromstring(_decode_html(html, encoding), parser=_LXML_PARSER)
+        paragraphs = (p.text_content().strip() for p in tree.iter('p'))
+        text = '\n\n'.join(p for p in paragraphs if p)
+        if len(text) < min_text_length:
+            return None
+        title = tree.findtext('.//title')
+        meta = tree.find('.//meta[@property="article:published_time"]')
+        return {
+            'title': title.strip() if title else None,
+            'published_at': meta.get('content') if meta is not None else None,
+            'full_text': text,
+        }
+    except Exception:
+        return None
 
 class ContentSpider(scrapy.Spider):
     name = 'content_spider'
@@ -10,67 +119,150 @@ class ContentSpider(scrapy.Spider):
     
     # --- Configuration ---
     PRECISION_SELECTORS = '.entry-content, .sponsored-article-content'
+    # Compiled once at import; parsel would otherwise redo CSS->XPath
+    # translation on every response.css() call.
+    PRECISION_XPATH = HTMLTranslator().css_to_xpath(PRECISION_SELECTORS)
     MIN_TEXT_LENGTH = 150
     # The pipeline will look for this filename
     FALLBACK_FILENAME = "fallback_urls.txt" 
 
-    def __init__(self, url_file=None, start_url=None, *args, **kwargs):
-        """Initializes the spider."""
+    def __init__(self, url_file=None, start_url=None, debug_dump=False,
+                 strategy='cascade', *args, **kwargs):
+        """Initializes the spider.
+
+        strategy:
+            'cascade' (default) -- try precision, fall back to general.
+            'fork' -- precision when the container is present, general
+            otherwise, with no fallback between them (the old
+            "latest_working" behavior).
+        debug_dump:
+            pass -a debug_dump=1 to archive every raw response into a
+            single tar for offline inspection.
+        """
         super(ContentSpider, self).__init__(*args, **kwargs)
-        self.start_urls = []
-        if url_file:
-            if not os.path.exists(url_file):
-                raise FileNotFoundError(f"The URL file was not found at: {url_file}")
-            with open(url_file, 'r') as f:
-                self.start_urls = [line.strip() for line in f if line.strip()]
-        elif start_url:
-            self.start_urls = [start_url]
-        else:
-             raise ValueError("Spider must be initialized with 'url_file' or 'start_url'")
-        self.logger.info(f"Initialized spider for {len(self.start_urls)} URL(s).")
-
-    def _extract_with_newspaper(self, html, url):
-        """Helper function to encapsulate newspaper3k extraction logic."""
-        try:
-            article = Article(url=url)
-            article.download(input_html=html)
-            article.parse()
-            if not article.text or len(article.text) < self.MIN_TEXT_LENGTH:
-                raise ArticleException(f"Extracted text is too short ({len(article.text)} chars).")
-            return article
-        except Exception as e:
-            self.logger.debug(f"Newspaper extraction failed for {url}: {e}")
-            return None
+        if not url_file and not start_url:
+            raise ValueError("Spider must be initialized with 'url_file' or 'start_url'")
+        if url_file and not os.path.exists(url_file):
+            raise FileNotFoundError(f"The URL file was not found at: {url_file}")
+        if strategy not in ('cascade', 'fork'):
+            raise ValueError(f"Unknown strategy: {strategy!r} (expected 'cascade' or 'fork')")
+        self.url_file = url_file
+        self.start_url = start_url
+        self.strategy = strategy
+
+        # Optional raw-response dumping (off by default). Responses are
+        # appended to a single long-lived tar instead of one
+        # open()/write()/close() per URL on the parse hot path.
+        self.debug_dump = str(debug_dump).lower() in ('1', 'true', 'yes')
+        self.debug_tar = None
+        self.response_counter = 0
+        if self.debug_dump:
+            debug_dir = 'DEBUG_RAW_RESPONSES'
+            os.makedirs(debug_dir, exist_ok=True)
+            self.debug_tar = tarfile.open(os.path.join(debug_dir, 'responses.tar'), 'w')
+        # Extraction is CPU-bound (lxml traversal, newspaper heuristics);
+        # running it in worker processes keeps the reactor thread free to
+        # fetch while parsing happens in parallel across cores. Workers are
+        # spawned, not forked: the pool starts them lazily on first submit,
+        # i.e. inside the running reactor, and forking a process with live
+        # threads can deadlock (and is deprecated on Python 3.12+).
+        self.pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    def start_requests(self):
+        """Yields one request per unique URL in the file.
+
+        The file is scanned via mmap + splitlines -- a single C-level pass
+        instead of one buffered readline call per line -- and deduplicated
+        with an order-preserving dict.fromkeys before dispatch.
+        """
+        if self.start_url:
+            yield scrapy.Request(self.start_url, callback=self.parse)
+            return
+        if os.path.getsize(self.url_file) == 0:
+            return
+        with open(self.url_file, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                urls = dict.fromkeys(
+                    line.decode().strip() for line in mm[:].splitlines() if line.strip())
+            finally:
+                mm.close()
+        for url in urls:
+            yield scrapy.Request(url, callback=self.parse)
+        self.logger.info("Dispatched %d unique URL(s) from %s.", len(urls), self.url_file)
+
+    async def parse(self, response):
+        """Extraction entry point; behavior depends on self.strategy."""
+        # Bind these once: every response.text access re-checks the decoded
+        # body and response.url is referenced on every path below.
+        url = response.url
+
+        if self.debug_dump:
+            self.response_counter += 1
+            safe_filename_part = url.split('?')[0].split('/')[-1] or "index"
+            debug_filename = f'{self.response_counter}_{safe_filename_part}.html'
+            self.logger.debug('Archiving raw response for %s as %s', url, debug_filename)
+            tarinfo = tarfile.TarInfo(debug_filename)
+            tarinfo.size = len(response.body)
+            self.debug_tar.addfile(tarinfo, io.BytesIO(response.body))
 
-    def parse(self, response):
-        """Cascading fallback: Precision -> General -> Fail."""
         if response.status == 403:
-            self.logger.warning(f"403 Forbidden for {response.url}. Yielding as failure.")
-            yield {'failed_url': response.url, 'reason': '403 Forbidden'}
+            self.logger.warning("403 Forbidden for %s. Yielding as failure.", url)
+            yield {'failed_url': url, 'reason': '403 Forbidden'}
             return
 
         # --- Try Precision Strategy ---
-        article_html_container = response.css(self.PRECISION_SELECTORS).get()
-        article = None
+        # The container comes from Scrapy's already-built selector tree, so
+        # the precision path never re-parses the full document.
+        article_html_container = response.xpath(self.PRECISION_XPATH).get()
+        result = None
         if article_html_container:
-            self.logger.info(f"Trying PRECISION strategy for {response.url}.")
-            article = self._extract_with_newspaper(html=article_html_container, url=response.url)
+            # Deferred %s formatting: the message is never built when the
+            # level is off, unlike an f-string.
+            self.logger.debug("Trying PRECISION strategy for %s.", url)
+            # Newspaper stays on the precision path: trafilatura's boilerplate
+            # detection underperforms on bare content containers.
+            result = await self._extract_in_pool(
+                _extract_with_newspaper, article_html_container, url)
 
         # --- Fallback to General Strategy ---
-        if not article:
-            self.logger.info(f"Trying GENERAL strategy for {response.url}.")
-            article = self._extract_with_newspaper(html=response.text, url=response.url)
-        
+        # In 'fork' mode a found container commits us to the precision
+        # result; only container-less pages take the general path.
+        if not result and not (self.strategy == 'fork' and article_html_container):
+            self.logger.debug("Trying GENERAL strategy for %s.", url)
+            # Raw bytes go to the worker; the decoded response.text copy is
+            # never built in the reactor process.
+            result = await self._extract_in_pool(
+                _extract_with_trafilatura, response.body, url,
+                encoding=response.encoding)
+
+        # --- Last Resort: plain lxml sweep ---
+        if not result and self.strategy == 'cascade':
+            self.logger.debug("Trying LAST-RESORT lxml strategy for %s.", url)
+            result = await self._extract_in_pool(
+                _extract_with_lxml, response.body, url,
+                encoding=response.encoding)
+
         # --- Yield Success or Failure ---
-        if article:
-            pub_date = article.publish_date
+        if result:
             yield {
-                'url': response.url,
-                'title': article.title,
-                'published_at': pub_date.isoformat() if pub_date else None,
-                'full_text': article.text,
-                'source_domain': response.url.split('/')[2],
+                'url': url,
+                **result,
+                'source_domain': _HOST_RE.match(url).group(1),
             }
         else:
-            self.logger.warning(f"All extraction strategies FAILED for {response.url}.")
-            yield {'failed_url': response.url, 'reason': 'Extraction Failed'}
\ No newline at end of file
+            self.logger.warning("All extraction strategies FAILED for %s.", url)
+            yield {'failed_url': url, 'reason': 'Extraction Failed'}
+
+    async def _extract_in_pool(self, extract_func, html, url, encoding=None):
+        """Runs one of the module-level extractors in a worker process."""
+        future = self.pool.submit(extract_func, html, url, self.MIN_TEXT_LENGTH, encoding)
+        return await asyncio.wrap_future(future)
+
+    def closed(self, reason):
+        self.pool.shutdown()
+        if self.debug_tar is not None:
+            self.debug_tar.close()
\ No newline at end of file
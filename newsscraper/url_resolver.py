@@ -1,29 +1,69 @@
 import asyncio
+from collections import defaultdict
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 import config
 
+# Resource types to abort while resolving redirects: a set-membership check
+# on resource_type is O(1), versus glob-matching every request URL.
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "stylesheet", "font", "media", "other"})
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
 async def resolve_url(page, google_url: str) -> str | None:
     """
     Uses a single Playwright page to resolve one Google redirect URL.
     This version uses the correct `page.wait_for_url` method.
     """
+    # Catch the redirect at the HTTP layer: the 301/302 Location header tells
+    # us the final URL without waiting on Playwright's JS-side URL polling.
+    redirect_future = asyncio.get_running_loop().create_future()
+
+    def on_response(response):
+        if redirect_future.done():
+            return
+        # Only main-frame document navigations count: a tracker 302 or an
+        # http->https hop on some subresource also carries a Location header
+        # and would otherwise be mistaken for the article URL.
+        request = response.request
+        if request.resource_type != "document" or request.frame != page.main_frame:
+            return
+        location = response.headers.get('location')
+        if location and response.status in (301, 302, 303, 307, 308):
+            target = urljoin(response.url, location)
+            if "google.com" not in urlparse(target).netloc:
+                redirect_future.set_result(target)
+
+    page.on('response', on_response)
+    nav_task = None
     try:
         # Go to the URL. 'commit' is often enough and faster for redirects.
         # 'load' or 'domcontentloaded' are also fine.
         await page.goto(google_url, wait_until='commit', timeout=15000)
 
-        # The key change: Wait for the URL to no longer be a google.com domain.
-        # This correctly handles the HTTP redirect.
-        await page.wait_for_url(
+        # Race the header fast path against the navigation wait: most Google
+        # News links redirect via JS/meta-refresh, where only wait_for_url
+        # fires, so the HTTP-redirect shortcut must never delay that case.
+        nav_task = asyncio.create_task(page.wait_for_url(
             lambda url: "google.com" not in urlparse(url).netloc,
             timeout=15000
-        )
-        
-        final_url = page.url
+        ))
+        await asyncio.wait({redirect_future, nav_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if redirect_future.done():
+            final_url = redirect_future.result()
+        else:
+            # Propagates the timeout if the navigation never left Google.
+            await nav_task
+            final_url = page.url
+
         print(f"  [SUCCESS] Resolved to: {final_url}")
         return final_url
-        
+
     except PlaywrightTimeoutError:
         print(f"  [FAILURE] Timeout resolving: {google_url}")
         return None
@@ -31,34 +71,70 @@ async def resolve_url(page, google_url: str) -> str | None:
         # This will catch other potential errors (e.g., net::ERR_CONNECTION_REFUSED)
         print(f"  [FAILURE] Error resolving {google_url}: {type(e).__name__}")
         return None
+    finally:
+        page.remove_listener('response', on_response)
+        redirect_future.cancel()
+        if nav_task is not None and not nav_task.done():
+            nav_task.cancel()
+            try:
+                await nav_task
+            except (asyncio.CancelledError, Exception):
+                pass
 
 async def run_resolver(google_urls: list[str]) -> list[str]:
     """
     Resolves a list of Google URLs in parallel using a pool of Playwright pages.
     """
     final_urls = set() # Use a set from the start to handle duplicates automatically
-    semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_BROWSERS)
+
+    # Aggregated Google News feeds repeat URLs constantly; dedupe before any
+    # page load is dispatched. dict.fromkeys keeps the original order.
+    unique_urls = list(dict.fromkeys(google_urls))
+    if len(unique_urls) < len(google_urls):
+        print(f"Deduplicated input: {len(google_urls)} URLs -> {len(unique_urls)} unique.")
 
     async with async_playwright() as p:
         # Use a more robust user-agent if you have one
         browser = await p.chromium.launch(headless=True)
-        
-        async def resolve_with_semaphore(url):
-            async with semaphore:
-                # Using a shared browser context can be more efficient
-                page = await browser.new_page(user_agent=config.USER_AGENT)
-                
-                # Block common resource types we don't need for resolving a URL
-                await page.route("**/*.{png,jpg,jpeg,gif,svg,css,woff,woff2}", lambda route: route.abort())
 
+        # Pool a fixed set of pages and reuse them: new_page() spins up a
+        # fresh JS context, cookie jar and network stack per call, which
+        # dwarfs the cost of the redirect fetch itself. The queue size also
+        # bounds concurrency, so no separate semaphore is needed.
+        page_pool = asyncio.Queue()
+        for _ in range(config.MAX_CONCURRENT_BROWSERS):
+            page = await browser.new_page(user_agent=config.USER_AGENT)
+            # Block resource types we don't need for resolving a URL;
+            # registered once per pooled page, not once per URL.
+            await page.route("**/*", _block_heavy_resources)
+            await page_pool.put(page)
+
+        # Cap concurrent fetches per origin host: hammering a single host
+        # (e.g. when every URL goes through google.com) just invites
+        # throttling that slows the whole batch down.
+        host_semaphores = defaultdict(lambda: asyncio.Semaphore(4))
+
+        async def resolve_with_pooled_page(url):
+            async with host_semaphores[urlparse(url).netloc]:
+                await _resolve_one(url)
+
+        async def _resolve_one(url):
+            page = await page_pool.get()
+            try:
                 resolved = await resolve_url(page, url)
                 if resolved:
                     final_urls.add(resolved)
-                await page.close()
+            finally:
+                # Reset state so one URL's cookies can't leak into the next.
+                await page.context.clear_cookies()
+                await page_pool.put(page)
 
-        print(f"Resolving {len(google_urls)} URLs with up to {config.MAX_CONCURRENT_BROWSERS} concurrent browsers...")
-        tasks = [resolve_with_semaphore(url) for url in google_urls]
+        print(f"Resolving {len(unique_urls)} URLs with a pool of {config.MAX_CONCURRENT_BROWSERS} pages...")
+        tasks = [resolve_with_pooled_page(url) for url in unique_urls]
         await asyncio.gather(*tasks)
+
+        while not page_pool.empty():
+            await (await page_pool.get()).close()
         await browser.close()
 
     return list(final_urls) # Return unique URLs
\ No newline at end of file